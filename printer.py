@@ -1,12 +1,42 @@
 import os
 import yaml
 import argparse
+import copy
 import pyperclip
 import re
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache, partial
 from io import StringIO
+from operator import methodcaller
 from pathspec import PathSpec
 
+# Use the libyaml C loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as _YamlLoader
+except ImportError:
+    from yaml import SafeLoader as _YamlLoader
+
+# Prefer the third-party regex package for user supplied patterns, it copes
+# better with pathological backtracking and supports a per-match timeout
+try:
+    import regex as _re
+    _RE_FLAGS = _re.VERSION0
+    _RE_TIMEOUT = True
+except ImportError:
+    import re as _re
+    _RE_FLAGS = 0
+    _RE_TIMEOUT = False
+
+# A pattern body made only of ordinary characters and escaped punctuation, which
+# can be tested with plain string methods instead of the regex engine
+_LITERAL_RE = re.compile(r'(?:[^\\.^$*+?{}\[\]|()]|\\[^A-Za-z0-9])+')
+_ESCAPE_RE = re.compile(r'\\(.)')
+
+# Parsed configurations by path, reused while the file's mtime and size are unchanged
+_config_cache = {}
+
 # ANSI escape codes for colors
 COLOR_CODES = {
     'reset': '\033[0m',
@@ -16,6 +46,13 @@ COLOR_CODES = {
     'default': ''
 }
 
+@dataclass(frozen=True, slots=True)
+class RegexEntry:
+    """A regexfiles entry from the configuration."""
+    dir: str
+    pattern: str
+    subdirs: bool = True
+
 def color_output(output, color_name):
     """Wraps the output string in ANSI color codes if output is to a terminal."""
     if sys.stdout.isatty():
@@ -23,13 +60,28 @@ def color_output(output, color_name):
     else:
         return output
 
+def _load_config(config_file):
+    """Loads the YAML configuration, reusing the previous parse if the file has not changed."""
+    stat = os.stat(config_file)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _config_cache.get(config_file)
+    if cached is None or cached[0] != key:
+        with open(config_file, 'r') as file:
+            cached = _config_cache[config_file] = (key, yaml.load(file, Loader=_YamlLoader))
+    # Hand out a copy so callers can't alter the cached parse
+    return copy.deepcopy(cached[1])
+
+@lru_cache(maxsize=32)
+def _load_gitignore_spec(gitignore_path, mtime_ns, size):
+    """Parses a gitignore file, cached by path, mtime and size since a PathSpec is never modified."""
+    patterns = _read_text(gitignore_path).splitlines()
+    return PathSpec.from_lines('gitwildmatch', patterns)
+
 def load_gitignore_patterns(gitignore_path):
     """Load gitignore patterns from the specified file."""
     try:
-        with open(gitignore_path, 'r') as gitignore_file:
-            patterns = gitignore_file.read().splitlines()
-            spec = PathSpec.from_lines('gitwildmatch', patterns)
-            return spec
+        stat = os.stat(gitignore_path)
+        return _load_gitignore_spec(gitignore_path, stat.st_mtime_ns, stat.st_size)
     except FileNotFoundError:
         print(f".gitignore file not found at: {gitignore_path}")
         return PathSpec.from_lines('gitwildmatch', [])
@@ -40,68 +92,220 @@ def is_excluded(path, spec, is_dir=False):
         path += '/'
     return spec.match_file(path)
 
-def get_tree_output(dir_path, spec):
-    """Returns the directory tree as a list, excluding paths matching gitignore patterns."""
-    tree = []
-    for root, dirs, files in os.walk(dir_path):
-        rel_root = os.path.relpath(root, dir_path)
-        if rel_root == '.':
-            rel_root = ''
-            level = 0
-        else:
-            level = rel_root.count(os.sep) + 1  # Adjust level for proper indentation
+def _walk(dir_path, spec):
+    """Yields (level, name, files) for dir_path and each subdirectory, top-down, skipping paths matching gitignore patterns."""
+    def scan(path, name, level, prefix):
+        subdirs = []
+        files = []
+        try:
+            entries = os.scandir(path)
+        except OSError:
+            return
+
+        # Errors are handled per entry as os.walk does: an entry that can't be
+        # stat'ed (e.g. a looping symlink) is listed as a file, and a listing
+        # that fails partway still yields what was read
+        with entries:
+            try:
+                for entry in entries:
+                    try:
+                        is_dir = entry.is_dir()
+                    except OSError:
+                        is_dir = False
+                    if not is_dir:
+                        files.append(entry)
+                        continue
+
+                    # Like os.walk, symlinked directories are not followed
+                    try:
+                        is_symlink = entry.is_symlink()
+                    except OSError:
+                        is_symlink = False
+                    if not is_symlink:
+                        subdirs.append(entry)
+            except OSError:
+                pass
+
+        # Paths relative to dir_path are built from the parent's prefix rather than
+        # os.path.relpath, and the whole directory is matched in one match_files
+        # batch, which prepares the pattern list once instead of once per path.
+        # Excluded directories are never descended into.
+        candidates = [prefix + e.name + '/' for e in subdirs] + [prefix + e.name for e in files]
+        excluded = set(spec.match_files(candidates))
+        if excluded:
+            subdirs = [e for e in subdirs if prefix + e.name + '/' not in excluded]
+            files = [e for e in files if prefix + e.name not in excluded]
+
+        yield level, name, files
+        for entry in subdirs:
+            yield from scan(entry.path, entry.name, level + 1, prefix + entry.name + '/')
+
+    yield from scan(dir_path, os.path.basename(dir_path), 0, '')
+
+def get_tree_output(dir_path, spec, listing=None):
+    """Returns the directory tree as a list, excluding paths matching gitignore patterns.
+
+    listing is an already collected list(_walk(dir_path, spec)), which lets the
+    same walk be shared with regexfiles matching.
+    """
+    if listing is None:
+        listing = _walk(dir_path, spec)
 
+    tree = []
+    for level, name, files in listing:
         indent = '    ' * level
         # Always use '+---' for subdirectories, including immediate subdirectories
-        tree.append(f"{indent}+---{os.path.basename(root)}")
-
-        # Filter directories and files based on gitignore patterns
-        dirs[:] = [d for d in dirs if not is_excluded(os.path.join(rel_root, d), spec, is_dir=True)]
-        files = [f for f in files if not is_excluded(os.path.join(rel_root, f), spec, is_dir=False)]
+        tree.append(f"{indent}+---{name}")
 
         # Append files in the current directory
-        for file in files:
-            file_indent = '    ' * (level + 1)
-            tree.append(f"{file_indent}+---{file}")
+        file_indent = '    ' * (level + 1)
+        for entry in files:
+            tree.append(f"{file_indent}+---{entry.name}")
     return tree
 
-def print_tree_and_file_contents(config_file, to_clipboard=False, dir_only=False, no_dirtree=False):
+def _read_text(path):
+    """Reads a file once as bytes and decodes it as utf-8, falling back to latin-1."""
+    with open(path, 'rb') as f:
+        data = f.read()
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError:
+        text = data.decode('latin-1')
+    # Keep the universal newline translation that text mode reads applied
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+def _compile_pattern(pattern, timeout=None):
+    """Returns a function testing a file name against a regexfiles pattern, raising _re.error if it is invalid."""
+    start = pattern.startswith('^')
+    end = pattern.endswith('$')
+    body = pattern[1 if start else 0:len(pattern) - 1 if end else len(pattern)]
+
+    # Literal prefixes/suffixes such as r'README\.md$' are a single string comparison
+    if _LITERAL_RE.fullmatch(body):
+        literal = _ESCAPE_RE.sub(r'\1', body)
+        if start and end:
+            return literal.__eq__
+        if start:
+            return methodcaller('startswith', literal)
+        if end:
+            return methodcaller('endswith', literal)
+        return methodcaller('__contains__', literal)
+
+    regex_compiled = _re.compile(pattern, _RE_FLAGS)
+    # Patterns anchored with '^' can only match at the start of the name,
+    # so use match() and let the engine stop after the first position.
+    # Alternations such as '^a|b' are not wholly anchored and keep search().
+    anchored = start and '|' not in pattern
+    match_fn = regex_compiled.match if anchored else regex_compiled.search
+    if timeout is not None:
+        match_fn = partial(match_fn, timeout=timeout)
+    return match_fn
+
+def _scan_regex_entry(regex_entry, spec, listings, regex_timeout=None):
+    """Finds the files matching one regexfiles entry, without reading them.
+
+    Returns a list of (file_path, error) in walk order. error is set when the
+    entry or a file could not be processed, with file_path None for problems
+    with the entry itself.
+    """
+    base_dir = regex_entry.dir
+    pattern = regex_entry.pattern
+
+    if not os.path.exists(base_dir):
+        return [(None, f"Base directory not found: {base_dir}")]
+
+    # Compile the regex pattern
+    try:
+        match_fn = _compile_pattern(pattern, regex_timeout)
+    except _re.error as e:
+        return [(None, f"Invalid regex pattern '{pattern}': {e}")]
+
+    if regex_entry.subdirs:
+        # Walk through the base directory, reusing the directory tree's walk
+        # when it already covered base_dir
+        walked = listings.get(base_dir)
+        if walked is None:
+            walked = _walk(base_dir, spec)
+        candidates = (entry for _level, _name, entries in walked for entry in entries)
+    else:
+        # Only process the specified directory
+        files_in_dir = []
+        try:
+            with os.scandir(base_dir) as entries:
+                for entry in entries:
+                    # Like os.path.isfile, an entry that can't be stat'ed (e.g. a
+                    # looping symlink) is not a file rather than an error
+                    try:
+                        is_file = entry.is_file()
+                    except OSError:
+                        is_file = False
+                    if is_file:
+                        files_in_dir.append(entry)
+        except Exception as e:
+            return [(None, f"Error accessing directory '{base_dir}': {e}")]
+        candidates = (entry for entry in files_in_dir if not is_excluded(entry.name, spec, is_dir=False))
+
+    results = []
+    for entry in candidates:
+        file_path = entry.path
+        try:
+            matched = match_fn(entry.name)
+        except TimeoutError:
+            results.append((file_path, f"Regex pattern '{pattern}' timed out on: {file_path}"))
+            continue
+
+        if matched:
+            results.append((file_path, None))
+    return results
+
+def _emit_file(output, term_lines, file_path, content):
+    """Adds a file's contents to the clipboard buffer and to the pending terminal output."""
+    output.write(f"\nFile: {file_path}\n```\n{content}\n```\n")
+    term_lines.append(f"\nFile: {file_path}\n```\n\n{content}\n\n```\n")
+
+def print_tree_and_file_contents(config_file, to_clipboard=False, dir_only=False, no_dirtree=False, regex_timeout=None):
     # Load the YAML configuration
-    with open(config_file, 'r') as file:
-        config = yaml.safe_load(file)
+    config = _load_config(config_file)
 
     # Add a list to store not found directories and files
     not_found = []
 
-    dirs = config.get('dirs', [])
-    files = config.get('files', [])
-    regex_files = config.get('regexfiles', [])
+    # Normalize configured paths once here rather than inside each loop
+    dirs = [os.path.normpath(d) for d in config.get('dirs', [])]
+    files = [os.path.normpath(f) for f in config.get('files', [])]
+    regex_files = [
+        RegexEntry(os.path.normpath(entry['dir']), entry['pattern'], bool(entry.get('subdirs', True)))
+        for entry in config.get('regexfiles', [])
+        if entry.get('dir') and entry.get('pattern')  # Skip invalid entries
+    ]
     gitignore_path = config.get('gitignore')
 
     # Load gitignore patterns
     spec = load_gitignore_patterns(gitignore_path) if gitignore_path else PathSpec.from_lines('gitwildmatch', [])
 
     output = StringIO()
+    # Terminal output is collected here and written to stdout in one go at the end
+    term_lines = []
     printed_files = set()
+    # Tree walks by directory, reused when a regexfiles entry searches the same directory
+    listings = {}
+
+    if regex_timeout is not None and not _RE_TIMEOUT:
+        not_found.append("Regex timeout ignored: the 'regex' package is not installed")
+        regex_timeout = None
 
 
     if no_dirtree:
         pass
     else:
         for dir_path in dirs:
-            dir_path = os.path.normpath(dir_path)
-
             if os.path.exists(dir_path):
-                tree_output = get_tree_output(dir_path, spec)
+                listings[dir_path] = list(_walk(dir_path, spec))
+                tree_text = "\n".join(get_tree_output(dir_path, spec, listings[dir_path]))
                 # Generate non-colored output for clipboard
-                output.write(f"\nDirectory: {dir_path}\n")
-                for line in tree_output:
-                    output.write(line + "\n")
-
-                # Print colored output to terminal
-                print(color_output(f"\nDirectory: {dir_path}\n", 'blue'))
-                for line in tree_output:
-                    print(color_output(line, 'blue'))
+                output.write(f"\nDirectory: {dir_path}\n{tree_text}\n")
+                # Colored output for the terminal, wrapped once for the whole tree
+                term_lines.append(color_output(f"\nDirectory: {dir_path}\n\n{tree_text}", 'blue'))
 
             else:
                 not_found.append(f"Directory not found: {dir_path}")
@@ -110,146 +314,57 @@ def print_tree_and_file_contents(config_file, to_clipboard=False, dir_only=False
     if not dir_only:
         # Process files specified under 'files'
         for file_path in files:
-            normalized_file_path = os.path.normpath(file_path)
-
-            if os.path.exists(normalized_file_path) and normalized_file_path not in printed_files:
+            if os.path.exists(file_path) and file_path not in printed_files:
                 # Check if file is excluded by gitignore patterns
-                rel_path = os.path.relpath(normalized_file_path)
+                rel_path = os.path.relpath(file_path)
                 if not is_excluded(rel_path, spec, is_dir=False):
-                    output.write(f"\nFile: {normalized_file_path}\n")
-                    output.write('```\n')
-                    try:
-                        with open(normalized_file_path, 'r', encoding='utf-8') as f:
-                            content = f.read()
-                    except UnicodeDecodeError:
-                        with open(normalized_file_path, 'r', encoding='latin-1') as f:
-                            content = f.read()
-                    output.write(content)
-                    output.write('\n```\n')
-                    printed_files.add(normalized_file_path)
-                    print(f"\nFile: {normalized_file_path}")
-                    print('```\n')
-                    print(content)
-                    print('\n```\n')
+                    content = _read_text(file_path)
+                    _emit_file(output, term_lines, file_path, content)
+                    printed_files.add(file_path)
                 else:
-                    not_found.append(f"File excluded by gitignore: {normalized_file_path}")
-                    output.write(f"\nFile excluded by gitignore: {normalized_file_path}\n")
+                    not_found.append(f"File excluded by gitignore: {file_path}")
+                    output.write(f"\nFile excluded by gitignore: {file_path}\n")
             else:
-                not_found.append(f"File not found: {normalized_file_path}")
-                output.write(f"\nFile not found: {normalized_file_path}\n")
-
-        # Process regex files
-        for regex_entry in regex_files:
-            base_dir = regex_entry.get('dir')
-            pattern = regex_entry.get('pattern')
-            subdirs = regex_entry.get('subdirs', True)  # Default to True
-
-            if not base_dir or not pattern:
-                continue  # Skip invalid entries
-
-            base_dir = os.path.normpath(base_dir)
-            if not os.path.exists(base_dir):
-                not_found.append(f"Base directory not found: {base_dir}")
-                output.write(f"\nBase directory not found: {base_dir}\n")
-                continue
-
-            # Compile the regex pattern
-            try:
-                regex_compiled = re.compile(pattern)
-            except re.error as e:
-                not_found.append(f"Invalid regex pattern '{pattern}': {e}")
-                output.write(f"\nInvalid regex pattern '{pattern}': {e}\n")
-                continue
-
-            if subdirs:
-                # Walk through the base directory and find matching files
-                for root, dirs, files_in_dir in os.walk(base_dir):
-                    rel_root = os.path.relpath(root, base_dir)
-                    if rel_root == '.':
-                        rel_root = ''
-
-                    # Filter directories based on gitignore patterns
-                    dirs[:] = [d for d in dirs if not is_excluded(os.path.join(rel_root, d), spec, is_dir=True)]
-
-                    for file_name in files_in_dir:
-                        file_path = os.path.join(root, file_name)
-                        rel_path = os.path.relpath(file_path, base_dir)
-
-                        if is_excluded(rel_path, spec, is_dir=False):
-                            continue  # Exclude files matching gitignore patterns
-
+                not_found.append(f"File not found: {file_path}")
+                output.write(f"\nFile not found: {file_path}\n")
+
+        # Process regex files. Entries are independent walks, so they are scanned
+        # concurrently. Matches are then deduplicated in configuration order, so
+        # each file is read at most once, and the remaining reads are overlapped.
+        if regex_files:
+            scan = partial(_scan_regex_entry, spec=spec, listings=listings, regex_timeout=regex_timeout)
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                selected = []
+                for results in executor.map(scan, regex_files):
+                    for file_path, error in results:
                         if file_path in printed_files:
-                            continue  # Skip files already printed
-
-                        if regex_compiled.search(file_name):
-                            # Read the file content
-                            try:
-                                with open(file_path, 'r', encoding='utf-8') as f:
-                                    content = f.read()
-                            except UnicodeDecodeError:
-                                with open(file_path, 'r', encoding='latin-1') as f:
-                                    content = f.read()
-                            # Write to output buffer
-                            output.write(f"\nFile: {file_path}\n")
-                            output.write('```\n')
-                            output.write(content)
-                            output.write('\n```\n')
+                            continue  # Skip files already printed or matched by an earlier entry
+                        if not error:
                             printed_files.add(file_path)
-                            # Print to terminal
-                            print(f"\nFile: {file_path}")
-                            print('```\n')
-                            print(content)
-                            print('\n```\n')
-            else:
-                # Only process the specified directory
-                try:
-                    files_in_dir = [f for f in os.listdir(base_dir) if os.path.isfile(os.path.join(base_dir, f))]
-                except Exception as e:
-                    not_found.append(f"Error accessing directory '{base_dir}': {e}")
-                    output.write(f"\nError accessing directory '{base_dir}': {e}\n")
-                    continue
-
-                for file_name in files_in_dir:
-                    file_path = os.path.join(base_dir, file_name)
-                    rel_path = os.path.relpath(file_path, base_dir)
-
-                    if is_excluded(rel_path, spec, is_dir=False):
-                        continue  # Exclude files matching gitignore patterns
-
-                    if file_path in printed_files:
-                        continue  # Skip files already printed
-
-                    if regex_compiled.search(file_name):
-                        # Read the file content
-                        try:
-                            with open(file_path, 'r', encoding='utf-8') as f:
-                                content = f.read()
-                        except UnicodeDecodeError:
-                            with open(file_path, 'r', encoding='latin-1') as f:
-                                content = f.read()
-                        # Write to output buffer
-                        output.write(f"\nFile: {file_path}\n")
-                        output.write('```\n')
-                        output.write(content)
-                        output.write('\n```\n')
-                        printed_files.add(file_path)
-                        # Print to terminal
-                        print(f"\nFile: {file_path}")
-                        print('```\n')
-                        print(content)
-                        print('\n```\n')
-
-    # At the end of the function, print all not found messages in red
+                        selected.append((file_path, error))
+
+                contents = executor.map(_read_text, [file_path for file_path, error in selected if not error])
+                for file_path, error in selected:
+                    if error:
+                        not_found.append(error)
+                        output.write(f"\n{error}\n")
+                    else:
+                        _emit_file(output, term_lines, file_path, next(contents))
+
+    # At the end of the function, print all not found and skipped messages in red
     if not_found:
-        print(color_output("\nFiles or directories not found:", 'red'))
-        for nf in not_found:
-            print(color_output(nf, 'red'))
+        term_lines.append(color_output("\nFiles or directories not found or skipped:\n" + "\n".join(not_found), 'red'))
 
     final_output = output.getvalue().strip()
 
     if to_clipboard:
         pyperclip.copy(final_output)
-        print(color_output("\nOutput has been copied to the clipboard.", 'green'))
+        term_lines.append(color_output("\nOutput has been copied to the clipboard.", 'green'))
+
+    # One write and flush for the whole run, so piped output (e.g. less -R) is not interleaved
+    if term_lines:
+        sys.stdout.write("\n".join(term_lines) + "\n")
+        sys.stdout.flush()
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Print directory tree and file contents with gitignore support.")
@@ -257,6 +372,7 @@ if __name__ == "__main__":
     parser.add_argument("--clipboard", action="store_true", help="Copy output to clipboard.")
     parser.add_argument("--dironly", action="store_true", help="Print only the directory structure, no file contents.")
     parser.add_argument("--nodirtree", action="store_true", help="Do not print directory structure.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds allowed per regexfiles match (requires the 'regex' package).")
     args = parser.parse_args()
 
-    print_tree_and_file_contents(args.config, to_clipboard=args.clipboard, dir_only=args.dironly, no_dirtree=args.nodirtree)
+    print_tree_and_file_contents(args.config, to_clipboard=args.clipboard, dir_only=args.dironly, no_dirtree=args.nodirtree, regex_timeout=args.timeout)
@@ -0,0 +1,10 @@
+import pathlib
+import pytest
+
+@pytest.fixture
+def write_files():
+    # Writes each {path: text} entry with a single bytes write
+    def write(contents):
+        for path, text in contents.items():
+            pathlib.Path(path).write_bytes(text.encode("utf-8"))
+    return write
@@ -1,6 +1,4 @@
 import os
-import tempfile
-import shutil
 import pytest
 import pyperclip
 from io import StringIO
@@ -8,9 +6,9 @@ from printer import print_tree_and_file_contents, load_gitignore_patterns, get_t
 import yaml
 
 @pytest.fixture
-def temp_dir_structure():
-    # Create a temporary directory
-    temp_dir = tempfile.mkdtemp()
+def temp_dir_structure(tmp_path, write_files):
+    # Use pytest's per-test temporary directory, which pytest cleans up itself
+    temp_dir = str(tmp_path)
 
     # Create subdirectories and files
     os.makedirs(os.path.join(temp_dir, "subdir"))
@@ -21,26 +19,18 @@ def temp_dir_structure():
         ".gitignore": os.path.join(temp_dir, ".gitignore")
     }
 
-    with open(file_paths["root_file.txt"], "w") as f:
-        f.write("This is the root file.")
-
-    with open(file_paths["subdir_file.txt"], "w") as f:
-        f.write("This is the file in a subdirectory.")
-
-    with open(file_paths["template.yml"], "w") as f:
-        f.write("dirs:\n  - {}\nfiles:\n  - {}\ngitignore: {}\n".format(
+    write_files({
+        file_paths["root_file.txt"]: "This is the root file.",
+        file_paths["subdir_file.txt"]: "This is the file in a subdirectory.",
+        file_paths["template.yml"]: "dirs:\n  - {}\nfiles:\n  - {}\ngitignore: {}\n".format(
             temp_dir, file_paths["root_file.txt"], file_paths[".gitignore"]
-        ))
-
-    with open(file_paths[".gitignore"], "w") as f:
-        f.write("*.txt\n!root_file.txt\n")
+        ),
+        file_paths[".gitignore"]: "*.txt\n!root_file.txt\n",
+    })
 
-    yield temp_dir, file_paths
+    return temp_dir, file_paths
 
-    # Clean up the temporary directory
-    shutil.rmtree(temp_dir)
-
-def test_print_tree_and_file_contents(temp_dir_structure, monkeypatch):
+def test_print_tree_and_file_contents(temp_dir_structure, monkeypatch, capsys):
     temp_dir, file_paths = temp_dir_structure
 
     # Mock the configuration file path and pyperclip
@@ -48,15 +38,11 @@ def test_print_tree_and_file_contents(temp_dir_structure, monkeypatch):
     clipboard_content = StringIO()
     monkeypatch.setattr(pyperclip, "copy", lambda x: clipboard_content.write(x))
 
-    # Capture the output
-    output = StringIO()
-    monkeypatch.setattr("sys.stdout", output)
-
     # Run the function
     print_tree_and_file_contents(config_file, to_clipboard=True, dir_only=False)
 
     # Check if the directory structure is printed correctly
-    output_value = output.getvalue()
+    output_value = capsys.readouterr().out
     assert "Directory: {}".format(temp_dir) in output_value
     assert "    +---root_file.txt" in output_value
     assert "subdir" in output_value  # Adjusted to match the output format
@@ -81,6 +67,20 @@ def test_gitignore_patterns(temp_dir_structure):
     assert not spec.match_file("root_file.txt")
     assert spec.match_file("subdir_file.txt")
 
+def test_gitignore_patterns_reloaded_after_change(temp_dir_structure):
+    temp_dir, file_paths = temp_dir_structure
+
+    # The first load is cached
+    spec = load_gitignore_patterns(file_paths[".gitignore"])
+    assert not spec.match_file("notes.md")
+
+    # Editing the .gitignore must not serve the cached patterns
+    with open(file_paths[".gitignore"], "a") as f:
+        f.write("*.md\n")
+
+    spec = load_gitignore_patterns(file_paths[".gitignore"])
+    assert spec.match_file("notes.md")
+
 def test_get_tree_output(temp_dir_structure):
     temp_dir, file_paths = temp_dir_structure
 
@@ -95,3 +95,53 @@ def test_get_tree_output(temp_dir_structure):
     assert "    +---root_file.txt" in tree_output  # Adjusted to match the output format
     assert "    +---subdir" in tree_output  # Adjusted to match the output format
     assert "+---subdir_file.txt" not in tree_output  # This should be ignored due to .gitignore
+
+def test_non_utf8_file_contents(temp_dir_structure, capsys):
+    temp_dir, file_paths = temp_dir_structure
+
+    # Write a latin-1 encoded file with Windows line endings
+    latin1_file = os.path.join(temp_dir, "latin1.md")
+    with open(latin1_file, "wb") as f:
+        f.write("café\r\nnaïve".encode("latin-1"))
+
+    with open(file_paths["template.yml"], "w") as f:
+        f.write("files:\n  - {}\n".format(latin1_file))
+
+    print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
+
+    # The file falls back to latin-1 and keeps text mode newline handling
+    output_value = capsys.readouterr().out
+    assert "café\nnaïve" in output_value
+    assert "\r" not in output_value
+
+def test_config_reloaded_after_change(temp_dir_structure, capsys):
+    temp_dir, file_paths = temp_dir_structure
+
+    # The first run parses and caches the configuration
+    print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
+    assert "This is the root file." in capsys.readouterr().out
+
+    # Rewriting the configuration must not serve the cached parse
+    with open(file_paths["template.yml"], "w") as f:
+        f.write("dirs:\n  - {}\n".format(temp_dir))
+
+    print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
+    output_value = capsys.readouterr().out
+    assert "Directory: {}".format(temp_dir) in output_value
+    assert "This is the root file." not in output_value
+
+def test_get_tree_output_self_referencing_symlink(temp_dir_structure):
+    temp_dir, file_paths = temp_dir_structure
+
+    # A symlink pointing at itself can't be stat'ed (ELOOP)
+    loop_path = os.path.join(temp_dir, "subdir", "selfloop")
+    try:
+        os.symlink("selfloop", loop_path)
+    except (OSError, NotImplementedError):
+        pytest.skip("Symlinks are not supported here")
+
+    tree_output = get_tree_output(temp_dir, load_gitignore_patterns(file_paths[".gitignore"]))
+
+    # Like os.walk, the broken entry is listed as a file and its directory is kept
+    assert "    +---subdir" in tree_output
+    assert "        +---selfloop" in tree_output
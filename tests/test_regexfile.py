@@ -1,16 +1,39 @@
 import os
-import tempfile
-import shutil
 import pytest
 import pyperclip
+import printer
 from io import StringIO
-from printer import print_tree_and_file_contents, load_gitignore_patterns, get_tree_output
-import yaml
+from printer import print_tree_and_file_contents, load_gitignore_patterns, get_tree_output, _compile_pattern
+
+def _yaml_scalar(value):
+    # Booleans as YAML literals, everything else single-quoted so Windows paths
+    # and regex metacharacters need no escaping
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return "'{}'".format(str(value).replace("'", "''"))
+
+def _render_config(config):
+    # Render a test configuration as YAML text without going through the YAML serializer
+    lines = []
+    for key, value in config.items():
+        if not isinstance(value, list):
+            lines.append("{}: {}".format(key, _yaml_scalar(value)))
+        elif not value:
+            lines.append("{}: []".format(key))
+        else:
+            lines.append("{}:".format(key))
+            for item in value:
+                if isinstance(item, dict):
+                    for i, (k, v) in enumerate(item.items()):
+                        lines.append("{}{}: {}".format("  - " if i == 0 else "    ", k, _yaml_scalar(v)))
+                else:
+                    lines.append("  - {}".format(_yaml_scalar(item)))
+    return "\n".join(lines) + "\n"
 
 @pytest.fixture
-def temp_dir_structure():
-    # Create a temporary directory
-    temp_dir = tempfile.mkdtemp()
+def temp_dir_structure(tmp_path, write_files):
+    # Use pytest's per-test temporary directory, which pytest cleans up itself
+    temp_dir = str(tmp_path)
 
     # Create subdirectories and files
     os.makedirs(os.path.join(temp_dir, "subdir"))
@@ -27,37 +50,23 @@ def temp_dir_structure():
     }
 
     # Create files with content
-    with open(file_paths["root_file.txt"], "w") as f:
-        f.write("This is the root file.")
-
-    with open(file_paths["subdir_file.txt"], "w") as f:
-        f.write("This is the file in a subdirectory.")
-
-    with open(file_paths["nested_subdir_file.py"], "w") as f:
-        f.write("print('This is a nested Python file.')")
-
-    with open(file_paths["init_file.py"], "w") as f:
-        f.write("# Root __init__.py")
-
-    with open(file_paths["subdir_init_file.py"], "w") as f:
-        f.write("# Subdir __init__.py")
-
-    with open(file_paths["template.yml"], "w") as f:
-        f.write("dirs:\n  - {}\nfiles:\n  - {}\ngitignore: {}\n".format(
+    write_files({
+        file_paths["root_file.txt"]: "This is the root file.",
+        file_paths["subdir_file.txt"]: "This is the file in a subdirectory.",
+        file_paths["nested_subdir_file.py"]: "print('This is a nested Python file.')",
+        file_paths["init_file.py"]: "# Root __init__.py",
+        file_paths["subdir_init_file.py"]: "# Subdir __init__.py",
+        file_paths["template.yml"]: "dirs:\n  - {}\nfiles:\n  - {}\ngitignore: {}\n".format(
             temp_dir, file_paths["root_file.txt"], file_paths[".gitignore"]
-        ))
-
-    with open(file_paths[".gitignore"], "w") as f:
-        f.write("*.txt\n!root_file.txt\n")
+        ),
+        file_paths[".gitignore"]: "*.txt\n!root_file.txt\n",
+    })
 
-    yield temp_dir, file_paths
-
-    # Clean up the temporary directory
-    shutil.rmtree(temp_dir)
+    return temp_dir, file_paths
 
 # New tests for regexfiles and subdirs functionality
 
-def test_regexfiles_subdirs_true(temp_dir_structure, monkeypatch):
+def test_regexfiles_subdirs_true(temp_dir_structure, capsys):
     temp_dir, file_paths = temp_dir_structure
 
     # Create a configuration that uses regexfiles with subdirs: true
@@ -76,16 +85,12 @@ def test_regexfiles_subdirs_true(temp_dir_structure, monkeypatch):
 
     # Write the configuration to the template.yml
     with open(file_paths["template.yml"], "w") as f:
-        yaml.dump(config, f)
-
-    # Capture the output
-    output = StringIO()
-    monkeypatch.setattr("sys.stdout", output)
+        f.write(_render_config(config))
 
     # Run the function
     print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
 
-    output_value = output.getvalue()
+    output_value = capsys.readouterr().out
 
     # Check that all .py files are included, including in subdirectories
     assert "File: {}".format(file_paths["init_file.py"]) in output_value
@@ -95,7 +100,7 @@ def test_regexfiles_subdirs_true(temp_dir_structure, monkeypatch):
     assert "File: {}".format(file_paths["nested_subdir_file.py"]) in output_value
     assert "print('This is a nested Python file.')" in output_value
 
-def test_regexfiles_subdirs_false(temp_dir_structure, monkeypatch):
+def test_regexfiles_subdirs_false(temp_dir_structure, capsys):
     temp_dir, file_paths = temp_dir_structure
 
     # Create a configuration that uses regexfiles with subdirs: false
@@ -114,16 +119,12 @@ def test_regexfiles_subdirs_false(temp_dir_structure, monkeypatch):
 
     # Write the configuration to the template.yml
     with open(file_paths["template.yml"], "w") as f:
-        yaml.dump(config, f)
-
-    # Capture the output
-    output = StringIO()
-    monkeypatch.setattr("sys.stdout", output)
+        f.write(_render_config(config))
 
     # Run the function
     print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
 
-    output_value = output.getvalue()
+    output_value = capsys.readouterr().out
 
     # Check that only .py files in the root directory are included
     assert "File: {}".format(file_paths["init_file.py"]) in output_value
@@ -132,7 +133,7 @@ def test_regexfiles_subdirs_false(temp_dir_structure, monkeypatch):
     assert "File: {}".format(file_paths["subdir_init_file.py"]) not in output_value
     assert "File: {}".format(file_paths["nested_subdir_file.py"]) not in output_value
 
-def test_regexfiles_exclude_init_py(temp_dir_structure, monkeypatch):
+def test_regexfiles_exclude_init_py(temp_dir_structure, capsys):
     temp_dir, file_paths = temp_dir_structure
 
     # Create a configuration that excludes __init__.py files
@@ -151,16 +152,12 @@ def test_regexfiles_exclude_init_py(temp_dir_structure, monkeypatch):
 
     # Write the configuration to the template.yml
     with open(file_paths["template.yml"], "w") as f:
-        yaml.dump(config, f)
-
-    # Capture the output
-    output = StringIO()
-    monkeypatch.setattr("sys.stdout", output)
+        f.write(_render_config(config))
 
     # Run the function
     print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
 
-    output_value = output.getvalue()
+    output_value = capsys.readouterr().out
 
     # __init__.py files should not be included
     assert "File: {}".format(file_paths["init_file.py"]) not in output_value
@@ -169,7 +166,7 @@ def test_regexfiles_exclude_init_py(temp_dir_structure, monkeypatch):
     assert "File: {}".format(file_paths["nested_subdir_file.py"]) in output_value
     assert "print('This is a nested Python file.')" in output_value
 
-def test_regexfiles_invalid_pattern(temp_dir_structure, monkeypatch):
+def test_regexfiles_invalid_pattern(temp_dir_structure, capsys):
     temp_dir, file_paths = temp_dir_structure
 
     # Create a configuration with an invalid regex pattern
@@ -188,21 +185,17 @@ def test_regexfiles_invalid_pattern(temp_dir_structure, monkeypatch):
 
     # Write the configuration to the template.yml
     with open(file_paths["template.yml"], "w") as f:
-        yaml.dump(config, f)
-
-    # Capture the output
-    output = StringIO()
-    monkeypatch.setattr("sys.stdout", output)
+        f.write(_render_config(config))
 
     # Run the function
     print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
 
-    output_value = output.getvalue()
+    output_value = capsys.readouterr().out
 
     # Check that an error message is displayed
     assert "Invalid regex pattern" in output_value
 
-def test_regexfiles_no_dir_or_pattern(temp_dir_structure, monkeypatch):
+def test_regexfiles_no_dir_or_pattern(temp_dir_structure, capsys):
     temp_dir, file_paths = temp_dir_structure
 
     # Create a configuration missing 'dir' and 'pattern' keys
@@ -219,16 +212,12 @@ def test_regexfiles_no_dir_or_pattern(temp_dir_structure, monkeypatch):
 
     # Write the configuration to the template.yml
     with open(file_paths["template.yml"], "w") as f:
-        yaml.dump(config, f)
-
-    # Capture the output
-    output = StringIO()
-    monkeypatch.setattr("sys.stdout", output)
+        f.write(_render_config(config))
 
     # Run the function
     print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
 
-    output_value = output.getvalue()
+    output_value = capsys.readouterr().out
 
     # The entry should be skipped without errors
     assert "Base directory not found" not in output_value
@@ -236,7 +225,7 @@ def test_regexfiles_no_dir_or_pattern(temp_dir_structure, monkeypatch):
     assert "Directory: {}".format(temp_dir) in output_value
     assert "File: {}".format(file_paths["root_file.txt"]) in output_value
 
-def test_regexfiles_gitignore_exclusion(temp_dir_structure, monkeypatch):
+def test_regexfiles_gitignore_exclusion(temp_dir_structure, capsys):
     temp_dir, file_paths = temp_dir_structure
 
     # Update .gitignore to exclude nested_subdir_file.py
@@ -259,21 +248,17 @@ def test_regexfiles_gitignore_exclusion(temp_dir_structure, monkeypatch):
 
     # Write the configuration to the template.yml
     with open(file_paths["template.yml"], "w") as f:
-        yaml.dump(config, f)
-
-    # Capture the output
-    output = StringIO()
-    monkeypatch.setattr("sys.stdout", output)
+        f.write(_render_config(config))
 
     # Run the function
     print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
 
-    output_value = output.getvalue()
+    output_value = capsys.readouterr().out
 
     # nested_subdir_file.py should be excluded due to .gitignore
     assert "File: {}".format(file_paths["nested_subdir_file.py"]) not in output_value
 
-def test_regexfiles_multiple_entries(temp_dir_structure, monkeypatch):
+def test_regexfiles_multiple_entries(temp_dir_structure, capsys):
     temp_dir, file_paths = temp_dir_structure
 
     # Create additional files in another subdirectory
@@ -303,16 +288,12 @@ def test_regexfiles_multiple_entries(temp_dir_structure, monkeypatch):
 
     # Write the configuration to the template.yml
     with open(file_paths["template.yml"], "w") as f:
-        yaml.dump(config, f)
-
-    # Capture the output
-    output = StringIO()
-    monkeypatch.setattr("sys.stdout", output)
+        f.write(_render_config(config))
 
     # Run the function
     print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
 
-    output_value = output.getvalue()
+    output_value = capsys.readouterr().out
 
     # Check that files are included as per the configuration
     assert "File: {}".format(file_paths["subdir_init_file.py"]) in output_value
@@ -320,7 +301,7 @@ def test_regexfiles_multiple_entries(temp_dir_structure, monkeypatch):
     assert "File: {}".format(another_py_file) in output_value
     assert "Another Python file." in output_value
 
-def test_regexfiles_files_not_found(temp_dir_structure, monkeypatch):
+def test_regexfiles_files_not_found(temp_dir_structure, capsys):
     temp_dir, file_paths = temp_dir_structure
 
     # Add a non-existent regexfiles entry
@@ -342,21 +323,17 @@ def test_regexfiles_files_not_found(temp_dir_structure, monkeypatch):
 
     # Write the configuration to the template.yml
     with open(file_paths["template.yml"], "w") as f:
-        yaml.dump(config, f)
-
-    # Capture the output
-    output = StringIO()
-    monkeypatch.setattr("sys.stdout", output)
+        f.write(_render_config(config))
 
     # Run the function
     print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
 
-    output_value = output.getvalue()
+    output_value = capsys.readouterr().out
 
     # Check that a message is displayed for the non-existent directory
     assert "Base directory not found: {}".format(non_existent_dir) in output_value
 
-def test_regexfiles_dironly_option(temp_dir_structure, monkeypatch):
+def test_regexfiles_dironly_option(temp_dir_structure, capsys):
     temp_dir, file_paths = temp_dir_structure
 
     # Create a configuration with some files
@@ -375,16 +352,12 @@ def test_regexfiles_dironly_option(temp_dir_structure, monkeypatch):
 
     # Write the configuration to the template.yml
     with open(file_paths["template.yml"], "w") as f:
-        yaml.dump(config, f)
-
-    # Capture the output
-    output = StringIO()
-    monkeypatch.setattr("sys.stdout", output)
+        f.write(_render_config(config))
 
     # Run the function with dir_only=True
     print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=True)
 
-    output_value = output.getvalue()
+    output_value = capsys.readouterr().out
 
     # Check that file contents are not printed
     assert "File:" not in output_value
@@ -409,7 +382,7 @@ def test_regexfiles_clipboard_option(temp_dir_structure, monkeypatch):
 
     # Write the configuration to the template.yml
     with open(file_paths["template.yml"], "w") as f:
-        yaml.dump(config, f)
+        f.write(_render_config(config))
 
     # Mock pyperclip
     clipboard_content = StringIO()
@@ -423,3 +396,193 @@ def test_regexfiles_clipboard_option(temp_dir_structure, monkeypatch):
     assert "Directory: {}".format(temp_dir) in clipboard_value
     assert "File: {}".format(file_paths["root_file.txt"]) in clipboard_value
     assert "This is the root file." in clipboard_value
+
+def test_compile_pattern_literal_shortcuts():
+    # Literal suffix, prefix and exact patterns match like the regex they replace
+    assert _compile_pattern(r'file\.py$')("nested_file.py")
+    assert not _compile_pattern(r'file\.py$')("nested_file.pyc")
+    assert _compile_pattern(r'^nested')("nested_file.py")
+    assert not _compile_pattern(r'^nested')("a_nested_file.py")
+    assert _compile_pattern(r'^__init__\.py$')("__init__.py")
+    assert not _compile_pattern(r'^__init__\.py$')("__init__.pyc")
+
+    # An unescaped '.' is still a wildcard, so it must not be treated literally
+    assert _compile_pattern(r'file.py$')("nested_file_py")
+
+def test_regexfiles_overlapping_entries(temp_dir_structure, monkeypatch, capsys):
+    temp_dir, file_paths = temp_dir_structure
+
+    # Count file reads to check a file matched by two entries is read once
+    reads = []
+    read_text = printer._read_text
+    monkeypatch.setattr(printer, "_read_text", lambda path: reads.append(path) or read_text(path))
+
+    # Two entries that both match the nested file, scanned concurrently
+    config = {
+        'dirs': [],
+        'files': [],
+        'regexfiles': [
+            {
+                'dir': temp_dir,
+                'pattern': r'^nested_file\.py$',
+                'subdirs': True
+            },
+            {
+                'dir': os.path.join(temp_dir, "subdir"),
+                'pattern': r'^.*\.py$',
+                'subdirs': True
+            }
+        ],
+        'gitignore': file_paths[".gitignore"]
+    }
+
+    # Write the configuration to the template.yml
+    with open(file_paths["template.yml"], "w") as f:
+        f.write(_render_config(config))
+
+    # Run the function
+    print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
+
+    output_value = capsys.readouterr().out
+
+    # The shared file is printed once, and results keep the configuration order
+    nested_header = "File: {}".format(file_paths["nested_subdir_file.py"])
+    init_header = "File: {}".format(file_paths["subdir_init_file.py"])
+    assert output_value.count(nested_header) == 1
+    assert output_value.index(nested_header) < output_value.index(init_header)
+    assert reads.count(file_paths["nested_subdir_file.py"]) == 1
+
+def test_regexfiles_self_referencing_symlink(temp_dir_structure, capsys):
+    temp_dir, file_paths = temp_dir_structure
+
+    # A symlink pointing at itself can't be stat'ed (ELOOP)
+    try:
+        os.symlink("selfloop", os.path.join(temp_dir, "subdir", "selfloop"))
+    except (OSError, NotImplementedError):
+        pytest.skip("Symlinks are not supported here")
+
+    config = {
+        'regexfiles': [
+            {
+                'dir': temp_dir,
+                'pattern': r'^nested',
+                'subdirs': True
+            }
+        ],
+        'gitignore': file_paths[".gitignore"]
+    }
+
+    # Write the configuration to the template.yml
+    with open(file_paths["template.yml"], "w") as f:
+        f.write(_render_config(config))
+
+    # Run the function
+    print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
+
+    output_value = capsys.readouterr().out
+
+    # Files beside and below the broken symlink are still found
+    assert "File: {}".format(file_paths["nested_subdir_file.py"]) in output_value
+
+def test_regexfiles_timeout_ignored_without_regex(temp_dir_structure, monkeypatch, capsys):
+    temp_dir, file_paths = temp_dir_structure
+
+    # Behave as if the optional regex package were not installed
+    monkeypatch.setattr(printer, "_RE_TIMEOUT", False)
+
+    config = {
+        'regexfiles': [
+            {
+                'dir': temp_dir,
+                'pattern': r'^.*\.py$',
+                'subdirs': True
+            }
+        ],
+        'gitignore': file_paths[".gitignore"]
+    }
+
+    # Write the configuration to the template.yml
+    with open(file_paths["template.yml"], "w") as f:
+        f.write(_render_config(config))
+
+    # Run the function with a timeout that can't be enforced
+    print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False, regex_timeout=1)
+
+    output_value = capsys.readouterr().out
+
+    # The timeout is reported as ignored and matching still happens
+    assert "Regex timeout ignored: the 'regex' package is not installed" in output_value
+    assert "File: {}".format(file_paths["nested_subdir_file.py"]) in output_value
+
+def test_regexfiles_timeout_skips_file(temp_dir_structure, monkeypatch, capsys):
+    temp_dir, file_paths = temp_dir_structure
+
+    # A match function that times out on the nested file only
+    def compile_pattern(pattern, timeout=None):
+        def match_fn(name):
+            if name == "nested_file.py":
+                raise TimeoutError("regex timed out")
+            return name.endswith(".py")
+        return match_fn
+
+    monkeypatch.setattr(printer, "_compile_pattern", compile_pattern)
+
+    config = {
+        'regexfiles': [
+            {
+                'dir': temp_dir,
+                'pattern': r'^.*\.py$',
+                'subdirs': True
+            }
+        ],
+        'gitignore': file_paths[".gitignore"]
+    }
+
+    # Write the configuration to the template.yml
+    with open(file_paths["template.yml"], "w") as f:
+        f.write(_render_config(config))
+
+    # Run the function
+    print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
+
+    output_value = capsys.readouterr().out
+
+    # The timed-out file is reported and skipped, other matches are printed
+    assert "Files or directories not found or skipped:" in output_value
+    assert "Regex pattern '^.*\\.py$' timed out on: {}".format(file_paths["nested_subdir_file.py"]) in output_value
+    assert "File: {}".format(file_paths["nested_subdir_file.py"]) not in output_value
+    assert "print('This is a nested Python file.')" not in output_value
+    assert "File: {}".format(file_paths["init_file.py"]) in output_value
+
+def test_regexfiles_self_referencing_symlink_no_subdirs(temp_dir_structure, capsys):
+    temp_dir, file_paths = temp_dir_structure
+
+    # A symlink pointing at itself can't be stat'ed (ELOOP)
+    try:
+        os.symlink("selfloop", os.path.join(temp_dir, "selfloop"))
+    except (OSError, NotImplementedError):
+        pytest.skip("Symlinks are not supported here")
+
+    config = {
+        'regexfiles': [
+            {
+                'dir': temp_dir,
+                'pattern': r'\.py$',
+                'subdirs': False
+            }
+        ],
+        'gitignore': file_paths[".gitignore"]
+    }
+
+    # Write the configuration to the template.yml
+    with open(file_paths["template.yml"], "w") as f:
+        f.write(_render_config(config))
+
+    # Run the function
+    print_tree_and_file_contents(file_paths["template.yml"], to_clipboard=False, dir_only=False)
+
+    output_value = capsys.readouterr().out
+
+    # Files beside the broken symlink are still found, with no access error
+    assert "File: {}".format(file_paths["init_file.py"]) in output_value
+    assert "Error accessing directory" not in output_value